@@ -460,7 +460,1281 @@ import matplotlib.pyplot as plt
 time_points = np.array(time_points)
 exact_heights = h0 + v0*time_points + 0.5*acceleration*time_points**2
 
-plt.plot(time_points, heights, label='Numerical solution')
-plt.plot(time_points, exact_heights, label='Exact solution')
+# We only draw the figure when we run this file, not when it is loaded
+# by the worker processes in the section on parameter sweeps below.
+if __name__ == '__main__':
+    plt.plot(time_points, heights, label='Numerical solution')
+    plt.plot(time_points, exact_heights, label='Exact solution')
+
+    plt.legend()
+
+
+#%% Going further: Simulating many balls at once
+# The ``simulate_ball_throw`` function simulates a single ball. If we
+# want to simulate thousands of balls with different initial heights
+# and velocities, we could call it in a for-loop. However, every time
+# step is then a couple of Python function calls, and for 100 000 balls
+# that becomes very slow.
+#
+# Luckily, ``euler_step`` and ``evolve_equations_of_motion`` only use
+# ``+`` and ``*``, which also work on NumPy arrays. We can therefore
+# store the state of all the balls in arrays and update every ball in
+# one go. The only thing we must change is the if-test: we cannot break
+# the loop when one ball hits the ground, since the other balls might
+# still be in the air. Instead, we keep a boolean array (a mask) that
+# tells us which balls are still in flight.
+
+def simulate_ball_throw_ensemble(
+    initial_heights,
+    initial_velocities,
+    initial_time,
+    acceleration,
+    simulation_time,
+    timestep
+):
+    heights, velocities = np.broadcast_arrays(
+        np.asarray(initial_heights, dtype=float),
+        np.asarray(initial_velocities, dtype=float)
+    )
+    heights = heights.copy()
+    velocities = velocities.copy()
+    time_points = np.full(heights.shape, float(initial_time))
+    in_flight = np.ones(heights.shape, dtype=bool)
+
+    time = initial_time
+    num_timesteps = int(simulation_time/timestep)
+    for i in range(num_timesteps):
+        new_heights, new_velocities, time = evolve_equations_of_motion(
+            heights, velocities, time, acceleration, timestep
+        )
+        in_flight &= new_heights >= 0
+        if not in_flight.any():
+            break
+
+        heights[in_flight] = new_heights[in_flight]
+        velocities[in_flight] = new_velocities[in_flight]
+        time_points[in_flight] = time
+
+    has_landed = ~in_flight
+    return heights, velocities, time_points, has_landed
+
+
+# The function returns one array for each quantity, where element i
+# belongs to ball i. ``heights``, ``velocities`` and ``time_points``
+# contain the last state before the ball hit the ground (or the final
+# state, if it never did), just like the last elements of the lists
+# returned by ``simulate_ball_throw``.
+#
+# From here on, we put the examples inside ``if __name__ == '__main__'``,
+# like the figure in the teaser. We explain why in the section on
+# parameter sweeps, and for now, it is enough to know that the if-test
+# is true when we run this file.
+
+if __name__ == '__main__':
+    num_balls = 100_000
+    initial_heights = np.random.uniform(1, 20, size=num_balls)
+    initial_velocities = np.random.uniform(-5, 5, size=num_balls)
+
+    final_heights, final_velocities, final_times, has_landed = (
+        simulate_ball_throw_ensemble(
+            initial_heights=initial_heights,
+            initial_velocities=initial_velocities,
+            initial_time=0,
+            acceleration=acceleration,
+            simulation_time=3,
+            timestep=dt
+        )
+    )
+    print(f'{has_landed.sum()} of {num_balls} balls landed within 3 seconds')
+
+    # Let us check that we get the same result as before for the first ball
+    heights, velocities, time_points = simulate_ball_throw(
+        initial_height=initial_heights[0],
+        initial_velocity=initial_velocities[0],
+        initial_time=0,
+        acceleration=acceleration,
+        simulation_time=3,
+        timestep=dt
+    )
+    print(heights[-1], final_heights[0])
+    print(time_points[-1], final_times[0])
+
+
+#%% Going further: Storing the trajectory in preallocated arrays
+# When we store the simulation in lists, Python must allocate a new
+# float object for every height, velocity and time point, and the lists
+# must grow as we append to them. Afterwards, we often convert the lists
+# to NumPy arrays anyway, as in the teaser above, which copies all the
+# data once more.
+#
+# Since we know the maximum number of time steps in advance, we can
+# instead allocate one NumPy array with room for the whole simulation
+# before the loop starts, and fill it in as we go. We use a so-called
+# structured array, where each element is a record with a time, a
+# height and a velocity field.
+
+trajectory_dtype = np.dtype([
+    ('time', float),
+    ('height', float),
+    ('velocity', float),
+])
+
+
+def simulate_ball_throw(
+    initial_height,
+    initial_velocity,
+    initial_time,
+    acceleration,
+    simulation_time,
+    timestep
+):
+    time = initial_time
+    height = initial_height
+    velocity = initial_velocity
+
+    # We store the initial state and at most one record per time step
+    num_timesteps = int(simulation_time/timestep)
+    trajectory = np.empty(num_timesteps + 1, dtype=trajectory_dtype)
+    trajectory[0] = time, height, velocity
+
+    num_stored = 1
+    for i in range(num_timesteps):
+        height, velocity, time = evolve_equations_of_motion(
+            height, velocity, time, acceleration, timestep
+        )
+        if height < 0:
+            break
+        trajectory[num_stored] = time, height, velocity
+        num_stored += 1
+
+    # If the ball hit the ground early, we shrink the array so that it
+    # only contains the time steps we simulated, and the unused memory is
+    # given back. NumPy may have to move the data to do this, but it
+    # never needs more memory than the full array. By default, ``resize``
+    # refuses to change arrays that other variables refer to, since those
+    # variables would then point to memory that is no longer ours. The
+    # array is created in this function, and nothing else refers to it
+    # yet, so we can safely turn off this check with ``refcheck=False``.
+    trajectory.resize(num_stored, refcheck=False)
+    return trajectory.view(np.recarray)
+
+
+# Viewing the array as a ``np.recarray`` lets us access the fields both
+# with indexing, ``trajectory['height']``, and as attributes,
+# ``trajectory.height``. Each field is a NumPy array, so we can use it
+# directly for plotting, without any conversion.
+
+if __name__ == '__main__':
+    trajectory = simulate_ball_throw(
+        initial_height=h0,
+        initial_velocity=v0,
+        initial_time=0,
+        acceleration=acceleration,
+        simulation_time=3,
+        timestep=dt
+    )
+    print(trajectory.height)
+    print(trajectory[-1])
+
+    exact_heights = (
+        h0 + v0*trajectory.time + 0.5*acceleration*trajectory.time**2
+    )
+    plt.figure()
+    plt.plot(trajectory.time, trajectory.height, label='Numerical solution')
+    plt.plot(trajectory.time, exact_heights, label='Exact solution')
+    plt.legend()
+
+
+#%% Going further: Choosing the integration scheme
+# The teaser shows that Euler's method is not very accurate unless we
+# use a very small time step, and small time steps means many steps. A
+# better solution is often to use a more accurate integration scheme.
+# Here, we implement two popular alternatives: the velocity Verlet
+# method, which is often used in physics simulations, and the classical
+# fourth order Runge-Kutta method (RK4).
+#
+# All the schemes take the same input arguments and return the same
+# values as ``evolve_equations_of_motion``. This way, we can store them
+# in a dictionary and choose between them by name. The acceleration can
+# either be a number or a function of the height, velocity and time,
+# e.g. if we want to include air resistance.
+
+def get_acceleration(acceleration, height, velocity, time):
+    if callable(acceleration):
+        return acceleration(height, velocity, time)
+    return acceleration
+
+
+def euler_integrator(height, velocity, time, acceleration, dt):
+    acceleration = get_acceleration(acceleration, height, velocity, time)
+    return evolve_equations_of_motion(
+        height, velocity, time, acceleration, dt
+    )
+
+
+def velocity_verlet_integrator(height, velocity, time, acceleration, dt):
+    old_acceleration = get_acceleration(acceleration, height, velocity, time)
+    height = height + velocity*dt + 0.5*old_acceleration*dt**2
+
+    # The new acceleration may depend on the new velocity, which we do not
+    # know yet. We therefore predict it with an Euler step, which is
+    # accurate enough to keep the method second order, also with drag.
+    predicted_velocity = velocity + old_acceleration*dt
+    new_acceleration = get_acceleration(
+        acceleration, height, predicted_velocity, time + dt
+    )
+    velocity = velocity + 0.5*(old_acceleration + new_acceleration)*dt
+
+    return height, velocity, time + dt
+
+
+def rk4_integrator(height, velocity, time, acceleration, dt):
+    k1_height = velocity
+    k1_velocity = get_acceleration(acceleration, height, velocity, time)
+
+    k2_height = velocity + 0.5*dt*k1_velocity
+    k2_velocity = get_acceleration(
+        acceleration,
+        height + 0.5*dt*k1_height,
+        velocity + 0.5*dt*k1_velocity,
+        time + 0.5*dt
+    )
+
+    k3_height = velocity + 0.5*dt*k2_velocity
+    k3_velocity = get_acceleration(
+        acceleration,
+        height + 0.5*dt*k2_height,
+        velocity + 0.5*dt*k2_velocity,
+        time + 0.5*dt
+    )
+
+    k4_height = velocity + dt*k3_velocity
+    k4_velocity = get_acceleration(
+        acceleration,
+        height + dt*k3_height,
+        velocity + dt*k3_velocity,
+        time + dt
+    )
+
+    height = height + dt*(k1_height + 2*k2_height + 2*k3_height + k4_height)/6
+    velocity = velocity + dt*(
+        k1_velocity + 2*k2_velocity + 2*k3_velocity + k4_velocity
+    )/6
+
+    return height, velocity, time + dt
+
+
+integrators = {
+    'euler': euler_integrator,
+    'velocity_verlet': velocity_verlet_integrator,
+    'rk4': rk4_integrator,
+}
+
+# To add a new scheme, we simply write a function with the same input
+# arguments and return values, and add it to the ``integrators``
+# dictionary.
+
+
+#%% Going further: Adaptive time steps and finding the exact impact time
+# So far, we have stopped the simulation at the first time step where
+# the ball is below ground. This means that the impact time we find can
+# be wrong by up to one time step, and to get it right, we need a small
+# time step throughout the whole flight.
+#
+# We solve these problems in two ways. First, once a step takes the ball
+# below ground, we search for the step length that places the ball
+# exactly at the ground with the bisection method. Second, we let the
+# simulation choose the time step by itself. We do this by comparing
+# one full step with two half steps. The difference between these is an
+# estimate of the error, and we increase the time step when the error
+# is small and decrease it when it is large.
+
+integrator_orders = {
+    'euler': 1,
+    'velocity_verlet': 2,
+    'rk4': 4,
+}
+
+
+def locate_impact(step, height, velocity, time, acceleration, dt):
+    # The ball is above ground after a step of length 0 and below ground
+    # after a step of length dt, so the impact happens somewhere between.
+    lower = 0
+    upper = dt
+    while upper - lower > 1e-12*dt:
+        middle = 0.5*(lower + upper)
+        middle_height, _, _ = step(height, velocity, time, acceleration, middle)
+        if middle_height < 0:
+            upper = middle
+        else:
+            lower = middle
+
+    _, velocity, time = step(height, velocity, time, acceleration, upper)
+    return 0.0, velocity, time
+
+
+def adaptive_step(step, order, height, velocity, time, acceleration, dt,
+                  tolerance, min_dt):
+    while True:
+        full_step = step(height, velocity, time, acceleration, dt)
+        half_step = step(height, velocity, time, acceleration, dt/2)
+        half_step = step(*half_step, acceleration, dt/2)
+
+        # Richardson error estimate for a method of the given order
+        error = max(
+            abs(full_step[0] - half_step[0]),
+            abs(full_step[1] - half_step[1])
+        )/(2**order - 1)
+        if error == 0:
+            scale = 5
+        else:
+            scale = min(5, max(0.2, 0.9*(tolerance/error)**(1/(order + 1))))
+
+        if error <= tolerance:
+            return half_step, dt, max(dt*scale, min_dt)
+
+        # If the tolerance is smaller than the rounding errors, the error
+        # estimate never becomes small enough, and the time step would
+        # shrink towards zero. We give up instead of looping forever.
+        if dt <= min_dt:
+            raise RuntimeError(
+                f'Could not reach a tolerance of {tolerance} with a time '
+                f'step of {min_dt}'
+            )
+        dt = max(dt*scale, min_dt)
+
+
+def simulate_ball_throw_adaptive(
+    initial_height,
+    initial_velocity,
+    initial_time,
+    acceleration,
+    simulation_time,
+    timestep,
+    integrator='rk4',
+    tolerance=1e-6
+):
+    step = integrators[integrator]
+    order = integrator_orders[integrator]
+    time = initial_time
+    height = initial_height
+    velocity = initial_velocity
+    end_time = initial_time + simulation_time
+    min_timestep = 1e-10*simulation_time
+
+    # We do not know the number of steps in advance, so we double the
+    # size of the array whenever it is full.
+    trajectory = np.empty(64, dtype=trajectory_dtype)
+    trajectory[0] = time, height, velocity
+
+    num_stored = 1
+    while time < end_time:
+        timestep = min(timestep, end_time - time)
+        (new_height, new_velocity, new_time), used_timestep, timestep = (
+            adaptive_step(
+                step, order, height, velocity, time, acceleration, timestep,
+                tolerance, min(min_timestep, timestep)
+            )
+        )
+        if new_height < 0:
+            new_height, new_velocity, new_time = locate_impact(
+                step, height, velocity, time, acceleration, used_timestep
+            )
+
+        if num_stored == len(trajectory):
+            trajectory.resize(2*len(trajectory), refcheck=False)
+        height, velocity, time = new_height, new_velocity, new_time
+        trajectory[num_stored] = time, height, velocity
+        num_stored += 1
+
+        if height == 0 and velocity < 0:
+            break
+
+    trajectory.resize(num_stored, refcheck=False)
+    return trajectory.view(np.recarray)
+
+
+#%% Going further: Skipping the simulation when we know the answer
+# When the acceleration is constant, we do not need to simulate at all,
+# since we know the exact solution:
+#     h(t) = h0 + v0*t + 0.5*a*t^2
+# To find when the ball hits the ground, we solve h(t) = 0 with the
+# quadratic formula, and the highest point is where the velocity,
+# v0 + a*t, is zero. These functions only use NumPy operations, so they
+# work just as well for arrays of initial conditions as for numbers.
+
+def compute_impact_time(initial_height, initial_velocity, acceleration):
+    initial_height = np.asarray(initial_height, dtype=float)
+    initial_velocity = np.asarray(initial_velocity, dtype=float)
+    acceleration = np.asarray(acceleration, dtype=float)
+
+    # Without acceleration, the equation is linear, not quadratic. We
+    # replace the acceleration by one where it is zero to avoid dividing
+    # by zero, and use the linear solution there instead.
+    no_acceleration = acceleration == 0
+    safe_acceleration = np.where(no_acceleration, 1, acceleration)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        discriminant = initial_velocity**2 - 2*safe_acceleration*initial_height
+        quadratic_roots = np.stack([
+            (-initial_velocity - np.sqrt(discriminant))/safe_acceleration,
+            (-initial_velocity + np.sqrt(discriminant))/safe_acceleration,
+        ])
+        linear_root = -initial_height/initial_velocity
+
+    # The impact time is the first positive root. A root at t=0 only
+    # counts if the ball is not moving upwards, since a ball thrown
+    # upwards from the ground leaves it before it comes back down. If
+    # there is no such root, the ball never hits the ground.
+    def is_impact(root):
+        return (root > 0) | ((root == 0) & (initial_velocity <= 0))
+
+    quadratic_roots[~is_impact(quadratic_roots)] = np.inf
+    impact_time = np.where(
+        no_acceleration,
+        np.where(is_impact(linear_root), linear_root, np.inf),
+        quadratic_roots.min(axis=0)
+    )
+    # A root at t=0 can be -0.0, which we turn into 0.0 with ``np.abs``.
+    # All other impact times are positive, so they are not changed.
+    return np.abs(impact_time)[()]
+
+
+def compute_apex(initial_height, initial_velocity, acceleration):
+    initial_height = np.asarray(initial_height, dtype=float)
+    initial_velocity = np.asarray(initial_velocity, dtype=float)
+    acceleration = np.asarray(acceleration, dtype=float)
+
+    # If the ball is thrown downwards, the highest point is at t=0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        apex_time = np.where(
+            (acceleration < 0) & (initial_velocity > 0),
+            -initial_velocity/acceleration,
+            0
+        )
+    apex_height = (
+        initial_height + initial_velocity*apex_time
+        + 0.5*acceleration*apex_time**2
+    )
+    return apex_time[()], apex_height[()]
 
-plt.legend()
\ No newline at end of file
+
+def simulate_ball_throw_exact(
+    initial_height,
+    initial_velocity,
+    initial_time,
+    acceleration,
+    simulation_time,
+    timestep
+):
+    num_timesteps = int(simulation_time/timestep)
+    impact_time = compute_impact_time(
+        initial_height, initial_velocity, acceleration
+    )
+
+    # Evaluate the exact solution on all time points before the impact
+    # at once, and finish with the impact itself.
+    elapsed_times = timestep*np.arange(num_timesteps + 1)
+    elapsed_times = elapsed_times[elapsed_times < impact_time]
+    if impact_time <= timestep*num_timesteps:
+        elapsed_times = np.append(elapsed_times, impact_time)
+
+    trajectory = np.empty(len(elapsed_times), dtype=trajectory_dtype)
+    trajectory['time'] = initial_time + elapsed_times
+    trajectory['height'] = (
+        initial_height + initial_velocity*elapsed_times
+        + 0.5*acceleration*elapsed_times**2
+    )
+    trajectory['velocity'] = initial_velocity + acceleration*elapsed_times
+    if impact_time <= timestep*num_timesteps:
+        trajectory['height'][-1] = 0
+    return trajectory.view(np.recarray)
+
+
+#%% Going further: Choosing the scheme in ``simulate_ball_throw``
+# We now have three integration schemes, adaptive time steps and the
+# exact solution. To make them easy to use, we add arguments for them
+# to ``simulate_ball_throw``, which still stores the trajectory in a
+# preallocated array. With ``integrator``, we choose the scheme by name,
+# or ``'exact'`` for the exact solution, and with ``adaptive=True``,
+# the simulation chooses the time step by itself. We also store the
+# exact moment the ball hits the ground as the last record, instead of
+# stopping at the last time step above ground.
+#
+# The exact solution is only used if we ask for it. With
+# ``integrator='auto'``, ``simulate_ball_throw`` checks whether the
+# acceleration is constant (a number and not a function), and then uses
+# the exact solution. Otherwise, it uses RK4.
+
+def simulate_ball_throw(
+    initial_height,
+    initial_velocity,
+    initial_time,
+    acceleration,
+    simulation_time,
+    timestep,
+    integrator='euler',
+    adaptive=False,
+    tolerance=1e-6
+):
+    if integrator == 'auto':
+        integrator = 'rk4' if callable(acceleration) else 'exact'
+
+    if integrator == 'exact':
+        if callable(acceleration):
+            raise ValueError(
+                'The exact solution requires a constant acceleration'
+            )
+        return simulate_ball_throw_exact(
+            initial_height, initial_velocity, initial_time, acceleration,
+            simulation_time, timestep
+        )
+    if adaptive:
+        return simulate_ball_throw_adaptive(
+            initial_height, initial_velocity, initial_time, acceleration,
+            simulation_time, timestep, integrator, tolerance
+        )
+
+    step = integrators[integrator]
+    time = initial_time
+    height = initial_height
+    velocity = initial_velocity
+
+    # We store the initial state and at most one record per time step
+    num_timesteps = int(simulation_time/timestep)
+    trajectory = np.empty(num_timesteps + 1, dtype=trajectory_dtype)
+    trajectory[0] = time, height, velocity
+
+    num_stored = 1
+    for i in range(num_timesteps):
+        new_height, new_velocity, new_time = step(
+            height, velocity, time, acceleration, timestep
+        )
+        if new_height < 0:
+            # Store the exact moment the ball hits the ground
+            height, velocity, time = locate_impact(
+                step, height, velocity, time, acceleration, timestep
+            )
+            trajectory[num_stored] = time, height, velocity
+            num_stored += 1
+            break
+        height, velocity, time = new_height, new_velocity, new_time
+        trajectory[num_stored] = time, height, velocity
+        num_stored += 1
+
+    # As before, we shrink the array to the time steps we simulated
+    trajectory.resize(num_stored, refcheck=False)
+    return trajectory.view(np.recarray)
+
+
+#%% Comparing the integration schemes
+# Since all the schemes are available through ``simulate_ball_throw``,
+# we can compare them with the same code. Let us compute the largest
+# error compared to the exact solution for a couple of time steps.
+
+if __name__ == '__main__':
+    for integrator in integrators:
+        for timestep in [0.1, 0.01, 0.001]:
+            trajectory = simulate_ball_throw(
+                initial_height=h0,
+                initial_velocity=v0,
+                initial_time=0,
+                acceleration=acceleration,
+                simulation_time=3,
+                timestep=timestep,
+                integrator=integrator
+            )
+            exact_heights = (
+                h0 + v0*trajectory.time + 0.5*acceleration*trajectory.time**2
+            )
+            max_error = np.max(np.abs(trajectory.height - exact_heights))
+            print(f'{integrator:>15s}, dt={timestep:5.3f}: {max_error:.2e} m')
+
+# For a constant acceleration, the exact solution is a second order
+# polynomial, which both velocity Verlet and RK4 integrate exactly (up
+# to rounding errors). With air resistance this is no longer the case,
+# but the higher order schemes still need far fewer steps than Euler's
+# method to reach the same accuracy.
+
+
+#%% Adaptive versus fixed time steps
+# Let us compare the number of time steps we need to find the impact
+# time with a fixed and an adaptive time step. The exact impact time is
+# found by solving h0 + v0*t + 0.5*a*t^2 = 0 for t.
+
+if __name__ == '__main__':
+    exact_impact_time = (-v0 - np.sqrt(v0**2 - 2*acceleration*h0))/acceleration
+
+    fixed_trajectory = simulate_ball_throw(
+        initial_height=h0,
+        initial_velocity=v0,
+        initial_time=0,
+        acceleration=acceleration,
+        simulation_time=3,
+        timestep=0.001,
+        integrator='euler'
+    )
+    adaptive_trajectory = simulate_ball_throw(
+        initial_height=h0,
+        initial_velocity=v0,
+        initial_time=0,
+        acceleration=acceleration,
+        simulation_time=3,
+        timestep=0.1,
+        integrator='rk4',
+        adaptive=True
+    )
+
+    print(f'Exact impact time: {exact_impact_time:.10f} s')
+    for name, trajectory in [('Fixed', fixed_trajectory),
+                             ('Adaptive', adaptive_trajectory)]:
+        print(
+            f'{name:>8s}: impact after {trajectory.time[-1]:.10f} s with '
+            f'velocity {trajectory.velocity[-1]:.4f} m/s '
+            f'using {len(trajectory) - 1} steps'
+        )
+
+
+#%% Using the exact solution
+# With ``integrator='exact'`` (or ``'auto'`` and a constant
+# acceleration), ``simulate_ball_throw`` skips the time stepping and
+# evaluates the exact solution for all time points at once. If we only want to know when the ball lands or how high it
+# goes, we do not need the trajectory at all.
+
+if __name__ == '__main__':
+    exact_trajectory = simulate_ball_throw(
+        initial_height=h0,
+        initial_velocity=v0,
+        initial_time=0,
+        acceleration=acceleration,
+        simulation_time=3,
+        timestep=dt,
+        integrator='exact'
+    )
+    print(exact_trajectory[-1])
+
+    apex_time, apex_height = compute_apex(h0, v0, acceleration)
+    print(f'Highest point: {apex_height:.3f} m after {apex_time:.3f} s')
+    print(f'Impact after {compute_impact_time(h0, v0, acceleration):.10f} s')
+
+    # And for all the balls from the ensemble simulation at once
+    impact_times = compute_impact_time(
+        initial_heights, initial_velocities, acceleration
+    )
+    apex_times, apex_heights = compute_apex(
+        initial_heights, initial_velocities, acceleration
+    )
+    print(f'Mean impact time: {impact_times.mean():.3f} s')
+    print(f'Mean apex height: {apex_heights.mean():.3f} m')
+
+    # A ball thrown upwards from the ground starts at the ground, but it
+    # should not count as an impact. Let us check that the exact solution
+    # agrees with RK4, which is exact for a constant acceleration.
+    for integrator in ['exact', 'rk4']:
+        trajectory = simulate_ball_throw(
+            initial_height=0,
+            initial_velocity=v0,
+            initial_time=0,
+            acceleration=acceleration,
+            simulation_time=3,
+            timestep=dt,
+            integrator=integrator
+        )
+        print(
+            f'{integrator:>5s}: impact after {trajectory.time[-1]:.6f} s, '
+            f'highest time point {trajectory.height.max():.6f} m'
+        )
+
+    apex_time, apex_height = compute_apex(0, v0, acceleration)
+    print(f'Highest point: {apex_height:.6f} m after {apex_time:.6f} s')
+    print(f'Impact after {compute_impact_time(0, v0, acceleration):.6f} s')
+
+
+#%% Going further: Parameter sweeps on multiple cores
+# We often want to run the simulation for every combination of a set of
+# initial heights, velocities, accelerations and time steps. Each of
+# these simulations is independent of the others, so we can run them in
+# parallel on all the cores of our computer with a process pool.
+#
+# A process pool starts several Python processes (workers) and sends
+# them work. Sending each simulation to a worker by itself is slow, so
+# we send the simulations in chunks. Each worker then returns a small
+# summary of each simulation instead of the full trajectory, which we
+# gather in a pandas DataFrame.
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+
+def summarise_ball_throw(parameters):
+    trajectory = simulate_ball_throw(**parameters)
+    has_landed = len(trajectory) > 1 and trajectory.height[-1] == 0
+
+    return {
+        **parameters,
+        'impact_time': trajectory.time[-1] if has_landed else np.nan,
+        'max_height': trajectory.height.max(),
+        'num_steps': len(trajectory) - 1,
+    }
+
+
+def sweep_ball_throws(parameter_grid, num_workers=None, chunk_size=None):
+    # The parameter grid is a dictionary that maps the argument names of
+    # ``simulate_ball_throw`` to lists of values to try.
+    names = list(parameter_grid)
+    all_parameters = [
+        dict(zip(names, values))
+        for values in itertools.product(*parameter_grid.values())
+    ]
+
+    if num_workers is None:
+        num_workers = os.cpu_count()
+    if chunk_size is None:
+        chunk_size = max(1, len(all_parameters)//(4*num_workers))
+
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        summaries = executor.map(
+            summarise_ball_throw, all_parameters, chunksize=chunk_size
+        )
+        return pd.DataFrame(list(summaries))
+
+
+# On Windows and macOS, the workers start by running this file from the
+# top, so we must make sure that they do not start a new sweep
+# themselves. The if-test below is only true in the main process. This
+# is also why all the examples in the "Going further" sections are
+# inside the same if-test: otherwise, every worker would run all of
+# them, write to the same files and draw the same figures, before it
+# could start on its share of the sweep. The workers still run the
+# introduction at the top of the file, but that only takes a moment.
+#
+# Note: On Windows and macOS, the workers find ``summarise_ball_throw``
+# by running this file, so the sweep only works when we run the whole
+# file as a script, e.g. with ``python 1.intro.py`` in a terminal. If we
+# run this cell in Spyder or IPython instead, the workers stop with the
+# error "Can't get attribute 'summarise_ball_throw'". The same problem
+# appears in the notebook, when we load many weather stations at once.
+
+if __name__ == '__main__':
+    sweep = sweep_ball_throws({
+        'initial_height': np.linspace(1, 20, 20),
+        'initial_velocity': np.linspace(-5, 5, 21),
+        'initial_time': [0],
+        'acceleration': [-9.81, -3.71, -1.62],  # Earth, Mars and the moon
+        'simulation_time': [10],
+        'timestep': [0.01, 0.001],
+    })
+    print(sweep.groupby(['acceleration', 'timestep'])['impact_time'].mean())
+
+
+#%% Going further: Remembering previous simulations
+# If we run the same simulation many times, e.g. to update a figure,
+# we waste time computing the same trajectory over and over. Instead,
+# we can store the results in a cache, which is a dictionary that maps
+# the input arguments to the simulated trajectory.
+#
+# To prevent the cache from using all our memory, we only keep the
+# ``max_size`` most recently used trajectories in memory. Optionally,
+# we can also save every trajectory to a .npz-file in a directory, so
+# that the cache survives restarting Python.
+#
+# Here, we use a class to keep the stored trajectories and the hit/miss
+# counters together.
+
+import hashlib
+import inspect
+import tempfile
+import zipfile
+from collections import OrderedDict
+
+
+class SimulationCache:
+    def __init__(self, max_size=128, directory=None):
+        self.max_size = max_size
+        self.directory = directory
+        self.trajectories = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def make_key(self, arguments):
+        return tuple(
+            (name, value if isinstance(value, str) else float(value))
+            for name, value in arguments.arguments.items()
+        )
+
+    def get_path(self, key):
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.directory, f'{digest}.npz')
+
+    def load(self, key):
+        # A file that cannot be read counts as a miss, so that a broken file
+        # is replaced the next time we simulate
+        try:
+            with np.load(self.get_path(key)) as stored:
+                return stored['trajectory'].view(np.recarray)
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+            return None
+
+    def save(self, key, trajectory):
+        # We write to a temporary file first and then rename it, so that
+        # we never leave a half-written file behind, even if two processes
+        # save the same simulation at once.
+        file_descriptor, temporary_path = tempfile.mkstemp(
+            dir=self.directory, suffix='.tmp'
+        )
+        try:
+            with os.fdopen(file_descriptor, 'wb') as file:
+                np.savez(file, trajectory=trajectory)
+            os.replace(temporary_path, self.get_path(key))
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+
+    def simulate(self, *args, **kwargs):
+        # Positional and keyword arguments, as well as default values,
+        # should give the same key, so we bind them to the parameter names
+        # of ``simulate_ball_throw`` first.
+        arguments = inspect.signature(simulate_ball_throw).bind(*args, **kwargs)
+        arguments.apply_defaults()
+        if callable(arguments.arguments['acceleration']):
+            # We cannot tell whether two functions are equal, so we do
+            # not cache simulations with a varying acceleration
+            return simulate_ball_throw(*args, **kwargs)
+
+        key = self.make_key(arguments)
+        if key in self.trajectories:
+            self.hits += 1
+            self.trajectories.move_to_end(key)
+            return self.trajectories[key]
+
+        trajectory = None
+        if self.directory is not None and os.path.exists(self.get_path(key)):
+            trajectory = self.load(key)
+
+        if trajectory is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            trajectory = simulate_ball_throw(*args, **kwargs)
+            if self.directory is not None:
+                self.save(key, trajectory)
+
+        # Everyone who asks for this simulation gets the same array, so
+        # we make it read-only to prevent accidental modifications.
+        trajectory.flags.writeable = False
+        self.trajectories[key] = trajectory
+        if len(self.trajectories) > self.max_size:
+            self.trajectories.popitem(last=False)
+        return trajectory
+
+    def clear(self):
+        self.trajectories.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+if __name__ == '__main__':
+    cache = SimulationCache(max_size=32)
+    for i in range(3):
+        trajectory = cache.simulate(
+            initial_height=h0,
+            initial_velocity=v0,
+            initial_time=0,
+            acceleration=acceleration,
+            simulation_time=3,
+            timestep=0.001
+        )
+    # Positional arguments give the same key as keyword arguments
+    trajectory = cache.simulate(h0, v0, 0, acceleration, 3, 0.001)
+    print(f'Cache hits: {cache.hits}, cache misses: {cache.misses}')
+
+
+#%% Going further: Simulations that do not fit in memory
+# If we simulate a long time with a tiny time step, the trajectory can
+# become too large to keep in memory. Instead of storing the whole
+# trajectory, we can use a generator that yields the trajectory in
+# blocks of ``block_size`` time steps. A generator is a function with
+# ``yield`` instead of ``return``. Every time we ask it for a new value
+# (e.g. with a for-loop), it runs until the next ``yield`` and pauses.
+
+def simulate_ball_throw_blocks(
+    initial_height,
+    initial_velocity,
+    initial_time,
+    acceleration,
+    simulation_time,
+    timestep,
+    integrator='euler',
+    block_size=65536
+):
+    step = integrators[integrator]
+    time = initial_time
+    height = initial_height
+    velocity = initial_velocity
+
+    block = np.empty(block_size, dtype=trajectory_dtype)
+    block[0] = time, height, velocity
+    num_stored = 1
+
+    num_timesteps = int(simulation_time/timestep)
+    for i in range(num_timesteps):
+        if num_stored == block_size:
+            yield block.view(np.recarray)
+            block = np.empty(block_size, dtype=trajectory_dtype)
+            num_stored = 0
+
+        new_height, new_velocity, new_time = step(
+            height, velocity, time, acceleration, timestep
+        )
+        if new_height < 0:
+            height, velocity, time = locate_impact(
+                step, height, velocity, time, acceleration, timestep
+            )
+            block[num_stored] = time, height, velocity
+            num_stored += 1
+            break
+        height, velocity, time = new_height, new_velocity, new_time
+        block[num_stored] = time, height, velocity
+        num_stored += 1
+
+    yield block[:num_stored].view(np.recarray)
+
+
+# We can then write the blocks to a file as they are computed. We use a
+# memory-mapped .npy-file, which is a NumPy array that lives on the disk
+# instead of in memory. The operating system takes care of moving the
+# data between memory and disk, so only the current block is in memory.
+
+def save_trajectory_blocks(blocks, filename, max_length):
+    trajectory = np.lib.format.open_memmap(
+        filename, mode='w+', dtype=trajectory_dtype, shape=(max_length,)
+    )
+    num_stored = 0
+    for block in blocks:
+        trajectory[num_stored:num_stored + len(block)] = block
+        num_stored += len(block)
+    trajectory.flush()
+    del trajectory
+
+    # The ball might land before the end of the simulation. In that
+    # case, we overwrite the file header with the true length and
+    # remove the unused part at the end of the file.
+    with open(filename, 'r+b') as file:
+        np.lib.format.read_magic(file)
+        np.lib.format.read_array_header_1_0(file)
+        data_start = file.tell()
+
+        file.seek(0)
+        np.lib.format.write_array_header_1_0(file, {
+            'descr': np.lib.format.dtype_to_descr(trajectory_dtype),
+            'fortran_order': False,
+            'shape': (num_stored,),
+        })
+        if file.tell() != data_start:
+            raise RuntimeError(f'Could not resize the header of {filename}')
+        file.truncate(data_start + num_stored*trajectory_dtype.itemsize)
+
+    return num_stored
+
+
+# We save the file in the folder for temporary files, so that we do not
+# fill our project folder with large files.
+
+if __name__ == '__main__':
+    trajectory_filename = os.path.join(tempfile.gettempdir(), 'trajectory.npy')
+    long_simulation_time = 3
+    small_timestep = 1e-5
+    num_stored = save_trajectory_blocks(
+        simulate_ball_throw_blocks(
+            initial_height=h0,
+            initial_velocity=v0,
+            initial_time=0,
+            acceleration=acceleration,
+            simulation_time=long_simulation_time,
+            timestep=small_timestep
+        ),
+        filename=trajectory_filename,
+        max_length=int(long_simulation_time/small_timestep) + 2
+    )
+
+    # With ``mmap_mode='r'``, ``np.load`` does not read the file into
+    # memory, it only reads the parts we use. Slicing the array (here we
+    # plot every 1000th time step) does not copy the data either.
+
+    trajectory = np.load(trajectory_filename, mmap_mode='r').view(np.recarray)
+    print(f'Stored {len(trajectory)} time steps, impact after '
+          f'{trajectory.time[-1]:.6f} s')
+
+    plot_points = trajectory[::1000]
+    exact_heights = (
+        h0 + v0*plot_points.time + 0.5*acceleration*plot_points.time**2
+    )
+    plt.figure()
+    plt.plot(plot_points.time, plot_points.height, label='Numerical solution')
+    plt.plot(plot_points.time, exact_heights, label='Exact solution')
+    plt.legend()
+
+
+#%% Going further: Many balls in three dimensions with air resistance
+# Until now, each ball has moved straight up and down. To simulate balls
+# that are thrown in any direction, we store the positions and the
+# velocities as arrays with shape (n, 3), one row for each ball and one
+# column for each of the x-, y- and z-coordinates (z is the height).
+#
+# The acceleration is now a function of the positions, velocities and
+# time, which computes the acceleration of all the balls at once. This
+# way, we can easily add forces such as air resistance (drag), which
+# for a ball is proportional to the squared speed and points in the
+# opposite direction of the velocity.
+
+def gravity(positions, velocities, time):
+    accelerations = np.zeros_like(velocities)
+    accelerations[:, 2] = -g
+    return accelerations
+
+
+def gravity_and_drag(positions, velocities, time, drag_coefficient=0.02):
+    speeds = np.linalg.norm(velocities, axis=1, keepdims=True)
+    accelerations = -drag_coefficient*speeds*velocities
+    accelerations[:, 2] -= g
+    return accelerations
+
+
+# The integrators we made earlier only use arithmetic and the
+# acceleration function, so they work for (n, 3) arrays as well. When a
+# ball hits the ground, we remove it from the arrays we integrate, so
+# we only spend time on the balls that are still in the air.
+
+def simulate_particles(
+    initial_positions,
+    initial_velocities,
+    initial_time,
+    acceleration,
+    simulation_time,
+    timestep,
+    integrator='euler'
+):
+    step = integrators[integrator]
+    final_positions = np.array(initial_positions, dtype=float)
+    final_velocities = np.array(initial_velocities, dtype=float)
+    impact_times = np.full(len(final_positions), np.nan)
+
+    # ``in_flight`` contains the row numbers of the balls in the air,
+    # and ``positions`` and ``velocities`` contain only those balls.
+    in_flight = np.flatnonzero(final_positions[:, 2] >= 0)
+    positions = final_positions[in_flight]
+    velocities = final_velocities[in_flight]
+    time = initial_time
+
+    num_timesteps = int(simulation_time/timestep)
+    for i in range(num_timesteps):
+        new_positions, new_velocities, new_time = step(
+            positions, velocities, time, acceleration, timestep
+        )
+
+        has_landed = new_positions[:, 2] < 0
+        if has_landed.any():
+            # Estimate when, during the last step, each ball hit the
+            # ground by linear interpolation of the height.
+            old_heights = positions[has_landed, 2]
+            new_heights = new_positions[has_landed, 2]
+            fraction = old_heights/(old_heights - new_heights)
+
+            landed = in_flight[has_landed]
+            impact_times[landed] = time + fraction*timestep
+            final_positions[landed] = (
+                positions[has_landed]
+                + fraction[:, np.newaxis]*(
+                    new_positions[has_landed] - positions[has_landed]
+                )
+            )
+            final_positions[landed, 2] = 0
+            final_velocities[landed] = (
+                velocities[has_landed]
+                + fraction[:, np.newaxis]*(
+                    new_velocities[has_landed] - velocities[has_landed]
+                )
+            )
+
+            in_flight = in_flight[~has_landed]
+            new_positions = new_positions[~has_landed]
+            new_velocities = new_velocities[~has_landed]
+
+        positions, velocities, time = new_positions, new_velocities, new_time
+        if len(in_flight) == 0:
+            break
+
+    final_positions[in_flight] = positions
+    final_velocities[in_flight] = velocities
+    return final_positions, final_velocities, impact_times
+
+
+if __name__ == '__main__':
+    num_balls = 10_000
+    initial_positions = np.zeros((num_balls, 3))
+    initial_positions[:, 2] = 1.5
+    launch_speeds = np.random.uniform(5, 30, size=num_balls)
+    launch_angles = np.random.uniform(0, np.pi/2, size=num_balls)
+    initial_velocities = np.stack([
+        launch_speeds*np.cos(launch_angles),
+        np.zeros(num_balls),
+        launch_speeds*np.sin(launch_angles),
+    ], axis=1)
+
+    for acceleration_function in [gravity, gravity_and_drag]:
+        final_positions, final_velocities, impact_times = simulate_particles(
+            initial_positions=initial_positions,
+            initial_velocities=initial_velocities,
+            initial_time=0,
+            acceleration=acceleration_function,
+            simulation_time=10,
+            timestep=0.01,
+            integrator='rk4'
+        )
+        print(
+            f'{acceleration_function.__name__:>16s}: '
+            f'mean distance {final_positions[:, 0].mean():.2f} m, '
+            f'mean flight time {np.nanmean(impact_times):.2f} s'
+        )
+
+
+#%% Going further: Choosing the time step automatically
+# How small must the time step be? Earlier, we compared the simulation
+# with the exact solution, but for most problems, we do not know the
+# exact solution. Instead, we can compare a simulation with time step dt
+# with a simulation with time step dt/2. For a method of order p, the
+# error is approximately C*dt^p, so halving the time step reduces the
+# error by a factor 2^p. From this, we can estimate the error of the
+# simulation with time step dt as
+#     (2^p / (2^p - 1)) * |coarse solution - fine solution|
+# This is called Richardson extrapolation.
+
+def estimate_simulation_error(timestep, integrator, **simulation_arguments):
+    coarse = simulate_ball_throw(
+        timestep=timestep, integrator=integrator, **simulation_arguments
+    )
+    fine = simulate_ball_throw(
+        timestep=timestep/2, integrator=integrator, **simulation_arguments
+    )
+
+    # Every second time point of the fine simulation coincides with a
+    # time point of the coarse simulation. The last time point is the
+    # impact, which happens at a different time in the two simulations,
+    # so we leave it out.
+    num_common = min(len(coarse), len(fine[::2])) - 1
+
+    # If the coarse simulation lands after a single step, only the initial
+    # state is compared, and that tells us nothing about the error.
+    if num_common < 2:
+        return np.inf
+
+    difference = np.abs(
+        coarse.height[:num_common] - fine.height[::2][:num_common]
+    )
+    order = integrator_orders[integrator]
+    return np.max(difference)*2**order/(2**order - 1)
+
+
+def tune_timestep(
+    target_error,
+    integrator='euler',
+    initial_timestep=0.1,
+    max_halvings=20,
+    max_doublings=20,
+    relative_precision=0.05,
+    **simulation_arguments
+):
+    study = []
+
+    def check_timestep(timestep):
+        error = estimate_simulation_error(
+            timestep, integrator, **simulation_arguments
+        )
+        study.append({'timestep': timestep, 'estimated_error': error})
+        return error <= target_error
+
+    # First, we find a time step that is good enough and one that is twice
+    # as large and too large. If the initial time step is good enough, we
+    # double it until it fails, otherwise we halve it until it works.
+    if check_timestep(initial_timestep):
+        good_timestep = initial_timestep
+        for i in range(max_doublings):
+            if not check_timestep(2*good_timestep):
+                break
+            good_timestep = 2*good_timestep
+        else:
+            return good_timestep, pd.DataFrame(study)
+        bad_timestep = 2*good_timestep
+    else:
+        bad_timestep = initial_timestep
+        for i in range(max_halvings):
+            if check_timestep(bad_timestep/2):
+                break
+            bad_timestep = bad_timestep/2
+        else:
+            raise RuntimeError(
+                f'Could not reach an error of {target_error} with {integrator}'
+            )
+        good_timestep = bad_timestep/2
+
+    # The largest time step that meets the target is somewhere between
+    # the two, and we find it with the bisection method. We split the
+    # interval at the geometric mean, since the time steps can span many
+    # orders of magnitude.
+    while bad_timestep > (1 + relative_precision)*good_timestep:
+        middle = np.sqrt(good_timestep*bad_timestep)
+        if check_timestep(middle):
+            good_timestep = middle
+        else:
+            bad_timestep = middle
+
+    return good_timestep, pd.DataFrame(study)
+
+
+def gravity_and_drag_1d(height, velocity, time, drag_coefficient=0.02):
+    return -g - drag_coefficient*abs(velocity)*velocity
+
+
+# The error estimate is only an estimate, so let us check the time steps
+# we find. We compare each simulation with RK4 with a time step that is
+# an integer fraction of the tuned time step and at most 1 ms, which is
+# far more accurate than the target. Every ``num_substeps``-th time point
+# of the reference then coincides with a time point of the simulation.
+
+if __name__ == '__main__':
+    simulation_arguments = {
+        'initial_height': h0,
+        'initial_velocity': v0,
+        'initial_time': 0,
+        'acceleration': gravity_and_drag_1d,
+        'simulation_time': 3,
+    }
+    for integrator in integrators:
+        timestep, study = tune_timestep(
+            target_error=1e-4,
+            integrator=integrator,
+            **simulation_arguments
+        )
+
+        num_substeps = int(np.ceil(timestep/1e-3))
+        trajectory = simulate_ball_throw(
+            timestep=timestep, integrator=integrator, **simulation_arguments
+        )
+        reference = simulate_ball_throw(
+            timestep=timestep/num_substeps,
+            integrator='rk4',
+            **simulation_arguments
+        )[::num_substeps]
+        num_common = min(len(trajectory), len(reference)) - 1
+        actual_error = np.max(np.abs(
+            trajectory.height[:num_common] - reference.height[:num_common]
+        ))
+        print(
+            f'{integrator:>15s}: dt={timestep:.2e} after {len(study)} '
+            f'trials, actual error {actual_error:.2e} m'
+        )